@@ -4,25 +4,42 @@ Comparativa detallada de modelos con tabla profesional
 import pandas as pd
 import matplotlib.pyplot as plt
 import json
+import sys
+import argparse
 
-def generar_tabla_comparativa():
-    """Tabla comparativa profesional de los 3 modelos"""
+# Agregar scripts al path
+sys.path.append('scripts')
+
+from perfiles_render import guardar_figura, agregar_argumentos
+
+def generar_tabla_comparativa(results=None, perfil='publicacion'):
+    """
+    Tabla comparativa profesional de los 3 modelos
+    
+    Args:
+        results: métricas por modelo (p. ej. de EvaluadorMultimodelo.evaluar).
+                 Si es None se usan las guardadas en model_metadata.json
+        perfil: perfil de renderizado de perfiles_render.PERFILES
+    """
     
-    # Cargar metadatos
-    with open('data/models/model_metadata.json', 'r') as f:
-        metadata = json.load(f)
+    if results is None:
+        # Cargar metadatos
+        with open('data/models/model_metadata.json', 'r') as f:
+            metadata = json.load(f)
+        
+        results = metadata['results']
     
-    results = metadata['results']
+    best_model = max(results, key=lambda m: results[m]['accuracy'])
     
     # Crear DataFrame
     data = []
     for model_name, metrics in results.items():
         data.append({
             'Modelo': model_name. replace('_', ' ').title(),
-            'Accuracy (%)': f"{metrics['accuracy']*100:. 2f}",
+            'Accuracy (%)': f"{metrics['accuracy']*100:.2f}",
             'Precision (%)': f"{metrics['precision']*100:.2f}",
             'Recall (%)': f"{metrics['recall']*100:.2f}",
-            'F1-Score (%)': f"{metrics['f1_score']*100:. 2f}",
+            'F1-Score (%)': f"{metrics['f1_score']*100:.2f}",
             'CV Method': metrics['cv_method']
         })
     
@@ -49,21 +66,39 @@ def generar_tabla_comparativa():
     
     # Estilizar filas
     colors = ['#ecf0f1', 'white']
+    best_row = list(results).index(best_model) + 1
     for i in range(1, len(df) + 1):
         for j in range(len(df.columns)):
             table[(i, j)].set_facecolor(colors[i % 2])
             
             # Destacar mejor modelo
-            if i == 2:  # Random Forest
+            if i == best_row:
                 table[(i, j)].set_edgecolor('#2ecc71')
                 table[(i, j)].set_linewidth(2)
     
     plt.title('Comparativa de Modelos de Aprendizaje Supervisado', 
              fontsize=14, fontweight='bold', pad=20)
     
-    plt.savefig('reportes_tesis/TABLA_COMPARATIVA_MODELOS.png', dpi=300, bbox_inches='tight')
+    guardar_figura('reportes_tesis/TABLA_COMPARATIVA_MODELOS.png', perfil)
     print("✅ Tabla comparativa generada")
     plt.close()
 
 if __name__ == '__main__':
-    generar_tabla_comparativa()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Tabla comparativa de los 3 modelos')
+    parser.add_argument('--cohorte', metavar='CSV', default=None,
+                        help='Evalúa los modelos guardados sobre esta cohorte en vez de usar model_metadata.json')
+    agregar_argumentos(parser)
+    args = parser.parse_args()
+    
+    results = None
+    if args.cohorte:
+        from evaluacion_multimodelo import EvaluadorMultimodelo, cargar_cohorte, imprimir_evaluacion
+        
+        X, y = cargar_cohorte(args.cohorte)
+        if y is None:
+            raise SystemExit("❌ La cohorte necesita la columna 'tier' para calcular métricas")
+        evaluacion = EvaluadorMultimodelo().evaluar(X, y)
+        imprimir_evaluacion(evaluacion)
+        results = evaluacion['results']
+    
+    generar_tabla_comparativa(results, args.perfil)
\ No newline at end of file
@@ -0,0 +1,137 @@
+"""
+Dashboard HTML de los reportes
+Los datos llegan ya agregados desde ReportGenerator.datos_dashboard() y se incrustan
+como JSON; los gráficos se dibujan en el navegador con Chart.js
+"""
+import json
+
+import numpy as np
+
+CHART_JS_CDN = 'https://cdn.jsdelivr.net/npm/chart.js@4.4.1/dist/chart.umd.min.js'
+
+PLANTILLA = """<!DOCTYPE html>
+<html lang="es">
+<head>
+    <meta charset="UTF-8">
+    <title>Reporte - Gaming Performance Predictor</title>
+    <script src="__CHART_JS__"></script>
+    <style>
+        body { font-family: 'Segoe UI', Arial, sans-serif; background: #ecf0f1; margin: 0; padding: 24px; color: #2c3e50; }
+        h1 { text-align: center; }
+        .grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(460px, 1fr)); gap: 20px; }
+        .card { background: white; border-radius: 8px; padding: 16px; box-shadow: 0 2px 6px rgba(0,0,0,0.1); }
+        .card h2 { font-size: 16px; margin-top: 0; }
+        table { border-collapse: collapse; margin: auto; }
+        td, th { border: 1px solid #bdc3c7; padding: 8px 14px; text-align: center; }
+        th { background: #3498db; color: white; }
+    </style>
+</head>
+<body>
+    <h1>📊 Reporte de Resultados</h1>
+    <p style="text-align: center;" id="metodo"></p>
+    <div class="grid" id="dashboard"></div>
+    <script id="datos" type="application/json">__DATOS__</script>
+    <script>
+        const datos = JSON.parse(document.getElementById('datos').textContent);
+        const colores = ['#e74c3c', '#f39c12', '#2ecc71', '#3498db', '#9b59b6'];
+        const contenedor = document.getElementById('dashboard');
+        document.getElementById('metodo').textContent = 'Métricas: ' + datos.metodo_metricas;
+
+        function tarjeta(titulo) {
+            const card = document.createElement('div');
+            card.className = 'card';
+            card.innerHTML = '<h2>' + titulo + '</h2>';
+            contenedor.appendChild(card);
+            return card;
+        }
+
+        function grafico(titulo, config) {
+            const canvas = document.createElement('canvas');
+            tarjeta(titulo).appendChild(canvas);
+            new Chart(canvas, config);
+        }
+
+        function tabla(titulo, filas, columnas, matriz, formato) {
+            let html = '<table><tr><th></th>' + columnas.map(c => '<th>' + c + '</th>').join('') + '</tr>';
+            matriz.forEach((fila, i) => {
+                html += '<tr><th>' + filas[i] + '</th>' + fila.map(v => '<td>' + formato(v) + '</td>').join('') + '</tr>';
+            });
+            tarjeta(titulo).insertAdjacentHTML('beforeend', html + '</table>');
+        }
+
+        function barras(labels, series, opciones) {
+            return {
+                type: 'bar',
+                data: {
+                    labels: labels,
+                    datasets: series.map((s, i) => ({ label: s.label, data: s.data, backgroundColor: colores[i % colores.length] }))
+                },
+                options: opciones || {}
+            };
+        }
+
+        grafico('Participant Distribution by Tier', barras(
+            datos.tiers.labels, [{ label: 'Participants', data: datos.tiers.conteos }]
+        ));
+
+        const modelos = Object.keys(datos.modelos);
+        grafico('Supervised Learning Model Comparison', barras(
+            modelos,
+            datos.metricas.map(m => ({ label: m, data: modelos.map(n => datos.modelos[n][m] * 100) }))
+        ));
+
+        tabla('Confusion Matrix - ' + datos.best_model, datos.tiers.labels, datos.tiers.labels,
+              datos.confusion_matrix, v => v);
+
+        grafico('Performance Metrics by Tier', barras(
+            datos.tiers.labels,
+            ['precision', 'recall', 'f1-score'].map(m => ({
+                label: m, data: datos.tiers.labels.map(t => datos.reporte_por_tier[t][m] * 100)
+            }))
+        ));
+
+        if (datos.feature_importance) {
+            grafico('Feature Importance', barras(
+                datos.feature_importance.features,
+                [{ label: 'Importance (%)', data: datos.feature_importance.valores.map(v => v * 100) }],
+                { indexAxis: 'y' }
+            ));
+        }
+
+        Object.entries(datos.histogramas).forEach(([feature, h]) => {
+            grafico('Distribution: ' + feature, barras(
+                h.bordes.slice(0, -1).map(b => b.toPrecision(3)),
+                h.por_tier.map((conteos, i) => ({ label: datos.tiers.labels[i], data: conteos }))
+            ));
+        });
+
+        if (datos.acuerdo) {
+            tabla('Model Agreement (%)', datos.acuerdo.modelos, datos.acuerdo.modelos,
+                  datos.acuerdo.matriz, v => (v * 100).toFixed(1));
+        }
+    </script>
+</body>
+</html>
+"""
+
+
+def _a_json(obj):
+    """json.default para tipos de numpy"""
+    if isinstance(obj, np.integer):
+        return int(obj)
+    if isinstance(obj, np.floating):
+        return float(obj)
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Tipo no serializable: {type(obj).__name__}")
+
+
+def generar_dashboard(datos, ruta):
+    """Escribe el dashboard con los datos agregados incrustados como JSON"""
+    # '</' cerraría el <script> que contiene el JSON
+    datos_json = json.dumps(datos, default=_a_json, ensure_ascii=False).replace('</', '<\\/')
+    html = PLANTILLA.replace('__CHART_JS__', CHART_JS_CDN).replace('__DATOS__', datos_json)
+
+    with open(ruta, 'w', encoding='utf-8') as f:
+        f.write(html)
+    return ruta
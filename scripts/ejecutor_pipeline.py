@@ -0,0 +1,281 @@
+"""
+Ejecutor de pipeline por etapas (DAG)
+Cada etapa guarda un checkpoint al terminar, las etapas independientes corren en paralelo
+y una ejecución puede acotarse con desde/hasta o reanudarse tras un fallo
+"""
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+
+import joblib
+
+from instrumentacion import Tracer
+
+
+class ErrorEtapa(Exception):
+    """Una etapa no pudo completarse (datos inválidos, archivos faltantes, etc.)"""
+
+
+class Etapa:
+    """
+    Nodo del pipeline.
+
+    funcion recibe un dict {nombre_dependencia: resultado} y devuelve el resultado
+    de la etapa, que se guarda como checkpoint. filas (opcional) extrae del resultado
+    el número de filas que se registra en el trace.
+
+    parametros (dict serializable a JSON) y entrada (callable que describe archivos
+    externos, p. ej. tamaño y fecha del CSV crudo) forman la huella del checkpoint:
+    si cambian, el checkpoint deja de ser válido y la etapa se re-ejecuta.
+    """
+
+    def __init__(self, nombre, funcion, dependencias=(), descripcion='', filas=None,
+                 parametros=None, entrada=None):
+        self.nombre = nombre
+        self.funcion = funcion
+        self.dependencias = tuple(dependencias)
+        self.descripcion = descripcion
+        self.filas = filas
+        self.parametros = parametros or {}
+        self.entrada = entrada
+
+
+class EjecutorPipeline:
+    def __init__(self, etapas, checkpoint_dir='data/checkpoints', tracer=None, max_workers=None):
+        self.etapas = {e.nombre: e for e in etapas}
+        self.orden = [e.nombre for e in etapas]
+        self.checkpoint_dir = checkpoint_dir
+        self.tracer = tracer if tracer is not None else Tracer()
+        self.max_workers = max_workers
+        self.estado_path = os.path.join(checkpoint_dir, 'estado.json')
+
+        for etapa in etapas:
+            for dep in etapa.dependencias:
+                if dep not in self.etapas:
+                    raise ValueError(f"La etapa '{etapa.nombre}' depende de '{dep}', que no existe")
+        self._validar_aciclico()
+
+    # ---------- Grafo ----------
+
+    def _validar_aciclico(self):
+        visitando, visitadas = set(), set()
+
+        def visitar(nombre):
+            if nombre in visitadas:
+                return
+            if nombre in visitando:
+                raise ValueError(f"Ciclo detectado en el pipeline en la etapa '{nombre}'")
+            visitando.add(nombre)
+            for dep in self.etapas[nombre].dependencias:
+                visitar(dep)
+            visitando.discard(nombre)
+            visitadas.add(nombre)
+
+        for nombre in self.orden:
+            visitar(nombre)
+
+    def _validar_nombre(self, nombre):
+        if nombre not in self.etapas:
+            raise ValueError(f"Etapa desconocida: '{nombre}'. Opciones: {', '.join(self.orden)}")
+
+    def ancestros(self, nombre):
+        """Etapas de las que depende nombre (directa o indirectamente)"""
+        resultado = set()
+        pendientes = list(self.etapas[nombre].dependencias)
+        while pendientes:
+            dep = pendientes.pop()
+            if dep not in resultado:
+                resultado.add(dep)
+                pendientes.extend(self.etapas[dep].dependencias)
+        return resultado
+
+    def descendientes(self, nombre):
+        """Etapas que dependen de nombre (directa o indirectamente)"""
+        return {n for n in self.orden if nombre in self.ancestros(n)}
+
+    # ---------- Checkpoints ----------
+
+    def _checkpoint_path(self, nombre):
+        return os.path.join(self.checkpoint_dir, f'{nombre}.joblib')
+
+    def _cargar_estado(self):
+        if not os.path.exists(self.estado_path):
+            return {}
+        with open(self.estado_path, 'r') as f:
+            return json.load(f)
+
+    def _guardar_estado(self, estado):
+        with open(self.estado_path, 'w') as f:
+            json.dump(estado, f, indent=2)
+
+    def huellas(self):
+        """
+        Huella actual de cada etapa: sus parámetros, su entrada externa y las
+        huellas de sus dependencias (un cambio aguas arriba invalida todo lo de abajo)
+        """
+        huellas = {}
+
+        def calcular(nombre):
+            if nombre not in huellas:
+                etapa = self.etapas[nombre]
+                contenido = {
+                    'parametros': etapa.parametros,
+                    'entrada': etapa.entrada() if etapa.entrada is not None else None,
+                    'dependencias': {dep: calcular(dep) for dep in etapa.dependencias},
+                }
+                texto = json.dumps(contenido, sort_keys=True, default=str)
+                huellas[nombre] = hashlib.sha256(texto.encode('utf-8')).hexdigest()[:16]
+            return huellas[nombre]
+
+        for nombre in self.orden:
+            calcular(nombre)
+        return huellas
+
+    def _tiene_checkpoint(self, nombre, estado, huellas):
+        return (
+            nombre in estado
+            and estado[nombre].get('huella') == huellas[nombre]
+            and os.path.exists(self._checkpoint_path(nombre))
+        )
+
+    def _cargar_checkpoint(self, nombre):
+        with self.tracer.etapa(f'{nombre} (checkpoint)', categoria='checkpoint'):
+            return joblib.load(self._checkpoint_path(nombre))
+
+    # ---------- Ejecución ----------
+
+    def planificar(self, desde=None, hasta=None, reanudar=False):
+        """
+        Devuelve (a_ejecutar, a_cargar): etapas que se ejecutan y checkpoints
+        que hay que leer para alimentarlas.
+        """
+        for nombre in (desde, hasta):
+            if nombre is not None:
+                self._validar_nombre(nombre)
+
+        if hasta is not None:
+            seleccion = self.ancestros(hasta) | {hasta}
+        else:
+            seleccion = set(self.orden)
+
+        estado = self._cargar_estado()
+        huellas = self.huellas()
+        forzadas = set()
+        if desde is not None:
+            forzadas = ({desde} | self.descendientes(desde)) & seleccion
+
+        if desde is not None or reanudar:
+            a_ejecutar = {
+                n for n in seleccion
+                if n in forzadas or not self._tiene_checkpoint(n, estado, huellas)
+            }
+        else:
+            a_ejecutar = set(seleccion)
+
+        # Si una etapa se re-ejecuta, todo lo que depende de ella dentro de la selección también
+        for nombre in list(a_ejecutar):
+            a_ejecutar |= self.descendientes(nombre) & seleccion
+
+        a_cargar = set()
+        for nombre in a_ejecutar:
+            for dep in self.etapas[nombre].dependencias:
+                if dep not in a_ejecutar:
+                    if not self._tiene_checkpoint(dep, estado, huellas):
+                        raise ErrorEtapa(
+                            f"Falta el checkpoint de '{dep}' necesario para '{nombre}'. "
+                            f"Ejecuta primero el pipeline hasta '{dep}'"
+                        )
+                    a_cargar.add(dep)
+
+        return a_ejecutar, a_cargar
+
+    def ejecutar(self, desde=None, hasta=None, reanudar=False):
+        """Ejecuta el pipeline y devuelve {nombre_etapa: resultado}"""
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        a_ejecutar, a_cargar = self.planificar(desde, hasta, reanudar)
+
+        resultados = {}
+        for nombre in self.orden:
+            if nombre in a_cargar:
+                print(f"♻️  Reutilizando checkpoint: {nombre}")
+                resultados[nombre] = self._cargar_checkpoint(nombre)
+
+        estado = self._cargar_estado()
+        huellas = self.huellas()
+        pendientes = [n for n in self.orden if n in a_ejecutar]
+        en_curso = {}
+        error = None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while pendientes or en_curso:
+                if error is None:
+                    listas = [
+                        n for n in pendientes
+                        if all(dep in resultados for dep in self.etapas[n].dependencias)
+                    ]
+                    # cProfile/pyinstrument solo ven el hilo principal: con profiler activo, o si
+                    # la etapa no tiene hermanas con las que paralelizar, se ejecuta aquí mismo
+                    en_hilo_principal = self.tracer.perfilando or (len(listas) == 1 and not en_curso)
+                    for nombre in listas:
+                        pendientes.remove(nombre)
+                        entradas = {dep: resultados[dep] for dep in self.etapas[nombre].dependencias}
+                        if en_hilo_principal:
+                            futuro = Future()
+                            try:
+                                futuro.set_result(self._ejecutar_etapa(nombre, entradas))
+                            except Exception as e:
+                                futuro.set_exception(e)
+                        else:
+                            futuro = pool.submit(self._ejecutar_etapa, nombre, entradas)
+                        en_curso[futuro] = nombre
+
+                if not en_curso:
+                    break
+
+                terminadas, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+                for futuro in terminadas:
+                    nombre = en_curso.pop(futuro)
+                    try:
+                        resultados[nombre], duracion = futuro.result()
+                    except Exception as e:
+                        if error is None:
+                            error = e
+                        continue
+
+                    for descendiente in self.descendientes(nombre):
+                        estado.pop(descendiente, None)
+                    estado[nombre] = {
+                        'completado': datetime.now().isoformat(timespec='seconds'),
+                        'duracion_s': round(duracion, 3),
+                        'huella': huellas[nombre],
+                    }
+                    self._guardar_estado(estado)
+
+        if error is not None:
+            raise error
+        return resultados
+
+    def _ejecutar_etapa(self, nombre, entradas):
+        etapa = self.etapas[nombre]
+        inicio = time.perf_counter()
+        with self.tracer.etapa(nombre) as m:
+            resultado = etapa.funcion(entradas)
+            if etapa.filas is not None:
+                m['filas'] = etapa.filas(resultado)
+        joblib.dump(resultado, self._checkpoint_path(nombre))
+        return resultado, time.perf_counter() - inicio
+
+    def imprimir_plan(self, desde=None, hasta=None, reanudar=False):
+        a_ejecutar, a_cargar = self.planificar(desde, hasta, reanudar)
+        print(f"\n🗺️  Plan de ejecución:")
+        for nombre in self.orden:
+            if nombre in a_ejecutar:
+                marca = '▶️  ejecutar  '
+            elif nombre in a_cargar:
+                marca = '♻️  checkpoint'
+            else:
+                marca = '⏭️  omitir    '
+            print(f"  {marca}  {nombre:<16} {self.etapas[nombre].descripcion}")
@@ -1,8 +1,15 @@
 """
 Script simplificado para entrenar modelos con datos del estudio piloto
 Procesa CSV exportado de Google Sheets y entrena modelos ML
+
+Uso:
+    python scripts/entrenar.py                       # pipeline completo
+    python scripts/entrenar.py --resume              # retoma tras un fallo
+    python scripts/entrenar.py --from entrenamiento  # re-entrena sin re-procesar
+    python scripts/entrenar.py --to features         # solo procesa los datos
 """
 import pandas as pd
+import argparse
 import sys
 import os
 
@@ -11,16 +18,32 @@ sys.path.append('backend')
 
 from backend.models.tier_mapping import rank_to_tier
 from backend.models.train import ModelTrainer
+from instrumentacion import agregar_argumentos, tracer_desde_args
+from ejecutor_pipeline import EjecutorPipeline, Etapa, ErrorEtapa
+from matrices_entrenamiento import MatricesEntrenamiento, FEATURES, acepta_sample_weight
+from politica_validacion import PoliticaValidacion, validar_kfold, registrar_en_metadata
 
-def main():
-    print("=" * 70)
-    print("🎯 ENTRENAMIENTO DE MODELOS - GAMING PERFORMANCE PREDICTOR")
-    print("=" * 70)
-    
-    # ========== PASO 1: CARGAR DATOS DEL CSV ==========
-    print("\n📂 PASO 1: Cargando datos del estudio piloto...")
-    
-    csv_path = 'data/raw/pilot_data.csv'
+CSV_PATH = 'data/raw/pilot_data.csv'
+OUTPUT_PATH = 'data/processed/pilot_study_data.csv'
+MODELS_DIR = 'data/models'
+CHECKPOINT_DIR = 'data/checkpoints'
+
+REQUIRED_COLS = [
+    'participant_id', 'date', 'game', 'rank',
+    'reaction_ms_mean', 'reaction_ms_std', 'false_starts',
+    'aim_accuracy', 'mean_time_to_hit_ms', 'miss_rate',
+    'cpm', 'error_rate', 'test_duration_s'
+]
+
+FEATURE_COLUMNS = FEATURES + ['tier']
+
+FALTANTES_OPCIONES = ('error', 'eliminar', 'conservar')
+
+
+# ========== PASO 1: RECOPILACIÓN ==========
+def etapa_recopilacion(entradas, csv_path=CSV_PATH):
+    """Verifica que exista el CSV exportado de Google Forms/Sheets"""
+    print("\n📂 PASO 1: Buscando datos del estudio piloto...")
     
     if not os.path.exists(csv_path):
         print(f"\n❌ ERROR: No se encuentra el archivo:  {csv_path}")
@@ -29,7 +52,16 @@ def main():
         print(f"   2. Guardar como: data/raw/pilot_data.csv")
         print(f"   3. El CSV debe tener estas columnas:")
         print(f"      participant_id,date,game,rank,reaction_ms_mean,...")
-        return False
+        raise ErrorEtapa(f"No se encuentra el archivo: {csv_path}")
+    
+    return huella_csv(csv_path)
+
+
+# ========== PASO 2: EXPORTACIÓN ==========
+def etapa_exportacion(entradas):
+    """Carga el CSV crudo"""
+    csv_path = entradas['recopilacion']['csv_path']
+    print(f"\n📥 PASO 2: Cargando {csv_path}...")
     
     df = pd.read_csv(csv_path)
     print(f"✅ {len(df)} participantes cargados")
@@ -38,44 +70,44 @@ def main():
     print(f"\n📋 Primeras 3 filas:")
     print(df.head(3))
     
-    # ========== PASO 2: VALIDAR COLUMNAS ==========
-    print(f"\n🔍 PASO 2: Validando estructura...")
+    return df
+
+
+# ========== PASO 3: PROCESAMIENTO ==========
+def etapa_procesamiento(entradas, faltantes='error'):
+    """Valida columnas, resuelve valores faltantes y convierte rangos a tiers"""
+    df = entradas['exportacion']
     
-    required_cols = [
-        'participant_id', 'date', 'game', 'rank',
-        'reaction_ms_mean', 'reaction_ms_std', 'false_starts',
-        'aim_accuracy', 'mean_time_to_hit_ms', 'miss_rate',
-        'cpm', 'error_rate', 'test_duration_s'
-    ]
+    print(f"\n🔍 PASO 3a: Validando estructura...")
     
-    missing_cols = [col for col in required_cols if col not in df.columns]
+    missing_cols = [col for col in REQUIRED_COLS if col not in df.columns]
     
     if missing_cols:
         print(f"\n❌ ERROR: Faltan columnas requeridas:")
         for col in missing_cols: 
             print(f"   - {col}")
         print(f"\n📋 Columnas encontradas: {df.columns.tolist()}")
-        return False
+        raise ErrorEtapa(f"Faltan columnas requeridas: {', '.join(missing_cols)}")
     
     print(f"✅ Todas las columnas necesarias están presentes")
     
-    # ========== PASO 3: VERIFICAR VALORES FALTANTES ==========
-    print(f"\n🔍 PASO 3: Verificando valores faltantes...")
+    print(f"\n🔍 PASO 3b: Verificando valores faltantes...")
     
-    missing = df[required_cols].isnull().sum()
+    missing = df[REQUIRED_COLS].isnull().sum()
     if missing.any():
         print(f"⚠️  Valores faltantes encontrados:")
         print(missing[missing > 0])
         
-        response = input(f"\n¿Eliminar filas con valores faltantes? (s/n):  ").lower()
-        if response == 's':
-            df = df.dropna(subset=required_cols)
+        if faltantes == 'eliminar':
+            df = df.dropna(subset=REQUIRED_COLS)
             print(f"✅ Filas eliminadas.  Quedan {len(df)} participantes")
+        elif faltantes == 'error':
+            print(f"\n💡 Vuelve a ejecutar con --faltantes eliminar o --faltantes conservar")
+            raise ErrorEtapa("Hay valores faltantes y no se indicó cómo tratarlos")
     else:
         print(f"✅ No hay valores faltantes")
     
-    # ========== PASO 4: CONVERTIR RANGOS A TIERS ==========
-    print(f"\n🎮 PASO 4: Convirtiendo rangos a tiers comunes...")
+    print(f"\n🎮 PASO 3c: Convirtiendo rangos a tiers comunes...")
     
     tiers = []
     errors = []
@@ -100,14 +132,21 @@ def main():
         print(f"   Fortnite:   Bronze I, Gold II, Platinum III, Diamond I, etc.")
         print(f"   Warzone:    Bronze, Silver, Gold, Platinum, Diamond, etc.")
         
-        return False
+        raise ErrorEtapa(f"{len(errors)} rangos no se pudieron convertir a tier")
     
-    df['tier'] = tiers
+    df = df.assign(tier=tiers)
     df = df.dropna(subset=['tier'])
     df['tier'] = df['tier']. astype(int)
     
-    # ========== PASO 5: MOSTRAR DISTRIBUCIÓN ==========
-    print(f"\n📊 PASO 5: Distribución de tiers:")
+    return df
+
+
+# ========== DIAGNÓSTICO (en paralelo con Feature Engineering) ==========
+def etapa_diagnostico(entradas):
+    """Distribución de tiers y validación de rangos de valores"""
+    df = entradas['procesamiento']
+    
+    print(f"\n📊 Distribución de tiers:")
     
     tier_counts = df['tier'].value_counts().sort_index()
     tier_labels = {0: 'Low', 1: 'Medium', 2: 'High'}
@@ -129,8 +168,7 @@ def main():
         print(f"\n⚠️  ADVERTENCIA:  Algunos tiers tienen menos de {min_samples_per_tier} muestras")
         print(f"   Esto puede afectar la precisión del modelo")
     
-    # ========== PASO 6: VALIDAR RANGOS DE VALORES ==========
-    print(f"\n🔍 PASO 6: Validando rangos de valores...")
+    print(f"\n🔍 Validando rangos de valores...")
     
     validations = {
         'reaction_ms_mean': (100, 500),
@@ -144,56 +182,94 @@ def main():
         'test_duration_s': (50, 150)
     }
     
-    has_issues = False
+    fuera_de_rango = {}
     for col, (min_val, max_val) in validations.items():
         out_of_range = df[(df[col] < min_val) | (df[col] > max_val)]
         if len(out_of_range) > 0:
-            has_issues = True
+            fuera_de_rango[col] = len(out_of_range)
             print(f"  ⚠️  {col}:  {len(out_of_range)} valores fuera de [{min_val}, {max_val}]")
             print(f"      Valores: {out_of_range[col].values}")
     
-    if not has_issues:
+    if not fuera_de_rango:
         print(f"  ✅ Todos los valores están en rangos esperados")
     
-    # ========== PASO 7: GUARDAR DATOS PROCESADOS ==========
-    print(f"\n💾 PASO 7: Guardando datos procesados...")
-    
-    feature_columns = [
-        'reaction_ms_mean', 'reaction_ms_std', 'false_starts',
-        'aim_accuracy', 'mean_time_to_hit_ms', 'miss_rate',
-        'cpm', 'error_rate', 'test_duration_s', 'tier'
-    ]
+    return {
+        'tier_counts': {int(t): int(c) for t, c in tier_counts.items()},
+        'fuera_de_rango': fuera_de_rango,
+    }
+
+
+# ========== PASO 4: FEATURE ENGINEERING ==========
+def etapa_features(entradas, output_path=OUTPUT_PATH):
+    """Selecciona las 9 features + tier y guarda los datos procesados"""
+    print(f"\n💾 PASO 4: Guardando datos procesados...")
     
-    df_processed = df[feature_columns]. copy()
+    df_processed = entradas['procesamiento'][FEATURE_COLUMNS]
     
-    output_path = 'data/processed/pilot_study_data.csv'
     os.makedirs(os.path. dirname(output_path), exist_ok=True)
     df_processed.to_csv(output_path, index=False)
     
     print(f"✅ Datos procesados guardados en: {output_path}")
     print(f"📊 {len(df_processed)} participantes válidos")
     
-    # ========== PASO 8: ENTRENAR MODELOS ==========
-    print(f"\n" + "=" * 70)
-    print(f"🤖 PASO 8: ENTRENANDO MODELOS CON LOOCV")
-    print(f"=" * 70)
-    
-    trainer = ModelTrainer()
+    return output_path
+
+
+# ========== PASO 5: NORMALIZACIÓN ==========
+def etapa_normalizacion(entradas, deduplicar=False):
+    """Matrices compactas X (float32) / y (int8); el StandardScaler se ajusta al entrenar"""
+    print(f"\n📐 PASO 5: Preparando matrices de entrenamiento...")
     
-    # Cargar datos
-    X, y = trainer.load_data(output_path)
+    datos = MatricesEntrenamiento.desde_csv(entradas['features'], deduplicar=deduplicar)
+    print(f"✅ {datos.resumen()}")
     
-    # Entrenar todos los modelos
-    results = trainer.train_all_models(X, y, use_loocv=True)
+    return datos
+
+
+# ========== PASO 6: ENTRENAMIENTO ==========
+def etapa_entrenamiento(entradas, politica=None):
+    """Entrena los 3 modelos con LOOCV o k-fold según el tamaño de la muestra"""
+    if politica is None:
+        politica = PoliticaValidacion()
     
-    # Guardar modelos
-    trainer.save_models('data/models')
+    datos, estrategia = politica.preparar(entradas['normalizacion'])
     
-    # ========== RESUMEN FINAL ==========
     print(f"\n" + "=" * 70)
-    print(f"🎉 ENTRENAMIENTO COMPLETADO EXITOSAMENTE")
+    print(f"🤖 PASO 6: ENTRENANDO MODELOS CON {estrategia['cv_method']}")
     print(f"=" * 70)
     
+    if estrategia['filas_submuestreadas']:
+        print(f"⚖️  Submuestreo balanceado: {len(datos)} filas "
+              f"(máx. {politica.max_por_tier} por tier, {estrategia['filas_submuestreadas']} descartadas)")
+    
+    # Con k-fold el trainer solo hace el ajuste final; la validación corre en etapa_modelos
+    kwargs = {'use_loocv': estrategia['usar_loocv']}
+    if datos.pesos is not None:
+        kwargs['sample_weight'] = datos.pesos
+    
+    trainer = ModelTrainer()
+    results = trainer.train_all_models(datos.X, datos.y, **kwargs)
+    
+    return {'trainer': trainer, 'results': results, 'estrategia': estrategia, 'datos': datos}
+
+
+# ========== PASO 7: MODELOS ==========
+def etapa_modelos(entradas, models_dir=MODELS_DIR):
+    """Guarda los modelos entrenados y muestra el resumen"""
+    trainer = entradas['entrenamiento']['trainer']
+    results = entradas['entrenamiento']['results']
+    estrategia = entradas['entrenamiento']['estrategia']
+    
+    print(f"\n📦 PASO 7: Guardando modelos en {models_dir}...")
+    trainer.save_models(models_dir)
+    
+    results_kfold = None
+    if not estrategia['usar_loocv']:
+        print(f"🔁 Validando con {estrategia['cv_method']}...")
+        results_kfold = validar_kfold(models_dir, entradas['entrenamiento']['datos'], estrategia)
+        results = results_kfold
+    best_model = registrar_en_metadata(models_dir, estrategia, results_kfold)
+    
     print(f"\n📊 Resumen de Resultados:")
     print(f"\n{'Modelo':<25} {'Accuracy':<12} {'Precision':<12} {'F1-Score':<12}")
     print(f"{'-'*60}")
@@ -201,8 +277,86 @@ def main():
     for model_name, res in results.items():
         print(f"{model_name:<25} {res['accuracy']:.4f}      {res['precision']:.4f}      {res['f1_score']:.4f}")
     
-    print(f"\n🏆 Mejor Modelo: {trainer.best_model_name. upper()}")
-    print(f"🎯 Accuracy (LOOCV): {results[trainer.best_model_name]['accuracy']:.4f}")
+    print(f"\n🏆 Mejor Modelo: {best_model.upper()}")
+    cv_method = results[best_model].get('cv_method', estrategia['cv_method'])
+    print(f"🎯 Accuracy ({cv_method}): {results[best_model]['accuracy']:.4f}")
+    
+    return {'models_dir': models_dir, 'best_model': best_model}
+
+
+def huella_csv(csv_path=CSV_PATH):
+    """Tamaño y fecha de modificación del CSV crudo (invalida los checkpoints si cambia)"""
+    if not os.path.exists(csv_path):
+        return {'csv_path': csv_path, 'existe': False}
+    stat = os.stat(csv_path)
+    return {'csv_path': csv_path, 'bytes': stat.st_size, 'modificado': stat.st_mtime}
+
+
+def construir_pipeline(faltantes='error', deduplicar=False, politica=None):
+    """DAG de las 7 etapas documentadas en pipeline_procesamiento.py"""
+    if politica is None:
+        politica = PoliticaValidacion()
+    
+    return [
+        Etapa('recopilacion', etapa_recopilacion,
+              descripcion='Mini-Test → Google Forms → CSV', entrada=huella_csv),
+        Etapa('exportacion', etapa_exportacion, ['recopilacion'],
+              descripcion=CSV_PATH, filas=len),
+        Etapa('procesamiento', lambda e: etapa_procesamiento(e, faltantes), ['exportacion'],
+              descripcion='Columnas, faltantes, rangos → tiers', filas=len,
+              parametros={'faltantes': faltantes}),
+        Etapa('diagnostico', etapa_diagnostico, ['procesamiento'],
+              descripcion='Distribución de tiers y rangos de valores'),
+        Etapa('features', etapa_features, ['procesamiento'],
+              descripcion=OUTPUT_PATH),
+        Etapa('normalizacion', lambda e: etapa_normalizacion(e, deduplicar), ['features'],
+              descripcion='Matrices X float32 / y int8', filas=len,
+              parametros={'deduplicar': deduplicar}),
+        Etapa('entrenamiento', lambda e: etapa_entrenamiento(e, politica), ['normalizacion'],
+              descripcion='3 modelos + LOOCV / k-fold estratificado',
+              parametros=politica.parametros()),
+        Etapa('modelos', etapa_modelos, ['entrenamiento'],
+              descripcion=f'{MODELS_DIR}/*.joblib + metadata'),
+    ]
+
+
+def main(tracer=None, desde=None, hasta=None, reanudar=False, faltantes='error', solo_plan=False,
+         deduplicar=False, politica=None):
+    print("=" * 70)
+    print("🎯 ENTRENAMIENTO DE MODELOS - GAMING PERFORMANCE PREDICTOR")
+    print("=" * 70)
+    
+    ejecutor = EjecutorPipeline(construir_pipeline(faltantes, deduplicar, politica), CHECKPOINT_DIR, tracer)
+    
+    try:
+        # Sin sample_weight, entrenar sobre filas colapsadas cambiaría el peso de cada participante
+        if deduplicar and not acepta_sample_weight(ModelTrainer.train_all_models):
+            raise ErrorEtapa("--deduplicar requiere que ModelTrainer.train_all_models acepte "
+                             "sample_weight=. Ejecuta sin --deduplicar")
+        ejecutor.imprimir_plan(desde, hasta, reanudar)
+        if solo_plan:
+            return True
+        ejecutor.ejecutar(desde, hasta, reanudar)
+    except ErrorEtapa as e:
+        print(f"\n❌ {e}")
+        print(f"💡 Los checkpoints de las etapas completadas están en {CHECKPOINT_DIR}/")
+        print(f"   Corrige el problema y vuelve a ejecutar con --resume")
+        return False
+    except Exception as e:
+        print(f"\n❌ Error inesperado: {type(e).__name__}: {e}")
+        print(f"💡 Los checkpoints de las etapas completadas están en {CHECKPOINT_DIR}/")
+        print(f"   Corrige el problema y vuelve a ejecutar con --resume")
+        raise
+    
+    # ========== RESUMEN FINAL ==========
+    print(f"\n" + "=" * 70)
+    print(f"🎉 PIPELINE COMPLETADO EXITOSAMENTE")
+    print(f"=" * 70)
+    
+    if hasta not in (None, 'modelos'):
+        print(f"\n⏸️  Ejecución detenida después de: {hasta}")
+        print(f"   Continúa con: python scripts/entrenar.py --resume")
+        return True
     
     print(f"\n📦 Archivos generados:")
     print(f"   data/processed/pilot_study_data.csv")
@@ -222,7 +376,41 @@ def main():
     return True
 
 if __name__ == '__main__':
-    success = main()
+    etapas = [e.nombre for e in construir_pipeline()]
+    
+    parser = argparse.ArgumentParser(description='Entrena los modelos con los datos del estudio piloto')
+    parser.add_argument('--from', dest='desde', choices=etapas, default=None,
+                        help='Re-ejecuta desde esta etapa usando los checkpoints anteriores')
+    parser.add_argument('--to', dest='hasta', choices=etapas, default=None,
+                        help='Se detiene después de esta etapa (solo ejecuta las etapas de las que '
+                             'depende: --to modelos omite diagnostico)')
+    parser.add_argument('--resume', dest='reanudar', action='store_true',
+                        help='Omite las etapas que ya tienen checkpoint')
+    parser.add_argument('--faltantes', choices=FALTANTES_OPCIONES, default='error',
+                        help='Qué hacer con filas con valores faltantes (por defecto: detenerse)')
+    parser.add_argument('--deduplicar', action='store_true',
+                        help='Colapsa filas idénticas y las pondera con sample_weight. LOOCV corre '
+                             'entonces sobre las filas únicas, así que sus métricas no son '
+                             'comparables con las de una ejecución sin --deduplicar')
+    parser.add_argument('--max-filas-loocv', type=int, default=1000,
+                        help='Por encima de este número de filas se usa Repeated Stratified K-Fold')
+    parser.add_argument('--folds', type=int, default=5, help='Folds del k-fold estratificado')
+    parser.add_argument('--repeticiones', type=int, default=3, help='Repeticiones del k-fold estratificado')
+    parser.add_argument('--max-por-tier', type=int, default=None,
+                        help='Entrena con una submuestra balanceada de a lo sumo N filas por tier')
+    parser.add_argument('--plan', dest='solo_plan', action='store_true',
+                        help='Muestra qué etapas se ejecutarían y termina')
+    agregar_argumentos(parser)
+    args = parser.parse_args()
+    tracer = tracer_desde_args(args)
+    politica = PoliticaValidacion(args.max_filas_loocv, args.folds, args.repeticiones, args.max_por_tier)
+
+    tracer.iniciar()
+    try:
+        success = main(tracer, args.desde, args.hasta, args.reanudar, args.faltantes, args.solo_plan,
+                       args.deduplicar, politica)
+    finally:
+        tracer.finalizar()
     
     if not success:
         print(f"\n❌ El entrenamiento no pudo completarse")
@@ -0,0 +1,129 @@
+"""
+Evaluación simultánea de los modelos guardados
+Escala la cohorte una sola vez, predice con los 3 modelos en paralelo y calcula
+métricas en vivo más matrices de acuerdo/desacuerdo entre modelos
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from itertools import combinations
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.metrics import (accuracy_score, precision_recall_fscore_support, confusion_matrix,
+                             classification_report)
+
+from matrices_entrenamiento import FEATURES
+
+MODELOS = ('logistic_regression', 'random_forest', 'linear_svm')
+TIERS = [0, 1, 2]
+TIER_LABELS = ['Low', 'Medium', 'High']
+
+
+def cargar_cohorte(path, features=FEATURES, target='tier'):
+    """Lee una cohorte en float32; devuelve (X, y) con y=None si el CSV no trae tier"""
+    columnas = pd.read_csv(path, nrows=0).columns
+    dtypes = {col: np.float32 for col in features}
+    usecols = list(features)
+    if target in columnas:
+        dtypes[target] = np.int8
+        usecols.append(target)
+
+    df = pd.read_csv(path, usecols=usecols, dtype=dtypes)
+    X = np.ascontiguousarray(df[list(features)].to_numpy())
+    y = df[target].to_numpy() if target in df.columns else None
+    return X, y
+
+
+class EvaluadorMultimodelo:
+    def __init__(self, models_dir='data/models', modelos=MODELOS, max_workers=None):
+        self.models_dir = models_dir
+        self.max_workers = max_workers
+
+        self.scaler = joblib.load(os.path.join(models_dir, 'scaler.joblib'))
+        self.modelos = {
+            nombre: joblib.load(os.path.join(models_dir, f'{nombre}.joblib'))
+            for nombre in modelos
+        }
+
+    def predecir(self, X):
+        """Predicciones de todos los modelos sobre una única matriz escalada"""
+        X_scaled = self.scaler.transform(X)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futuros = {nombre: pool.submit(modelo.predict, X_scaled)
+                       for nombre, modelo in self.modelos.items()}
+            return {nombre: futuro.result() for nombre, futuro in futuros.items()}
+
+    def evaluar(self, X, y=None):
+        """
+        Devuelve un dict con:
+            predicciones: {modelo: np.ndarray}
+            results: métricas por modelo con las mismas claves que model_metadata.json
+                     (solo si se pasa y)
+            best_model: modelo con mayor accuracy (solo si se pasa y)
+            acuerdo / desacuerdo: DataFrames modelo × modelo con la fracción de
+                     predicciones iguales / distintas
+            cruces: {(modelo_a, modelo_b): matriz 3×3 de predicciones a vs b}
+            unanimidad: fracción de filas en que los 3 modelos coinciden
+        """
+        predicciones = self.predecir(X)
+        nombres = list(predicciones)
+
+        acuerdo = pd.DataFrame(1.0, index=nombres, columns=nombres)
+        cruces = {}
+        for a, b in combinations(nombres, 2):
+            tasa = float(np.mean(predicciones[a] == predicciones[b]))
+            acuerdo.loc[a, b] = acuerdo.loc[b, a] = tasa
+            cruces[(a, b)] = confusion_matrix(predicciones[a], predicciones[b], labels=TIERS)
+
+        apiladas = np.vstack([predicciones[n] for n in nombres])
+        unanimidad = float(np.mean((apiladas == apiladas[0]).all(axis=0)))
+
+        evaluacion = {
+            'predicciones': predicciones,
+            'acuerdo': acuerdo,
+            'desacuerdo': 1.0 - acuerdo,
+            'cruces': cruces,
+            'unanimidad': unanimidad,
+            'n_filas': len(X),
+        }
+
+        if y is not None:
+            evaluacion['results'] = {nombre: self._metricas(y, pred) for nombre, pred in predicciones.items()}
+            evaluacion['best_model'] = max(evaluacion['results'],
+                                           key=lambda n: evaluacion['results'][n]['accuracy'])
+
+        return evaluacion
+
+    @staticmethod
+    def _metricas(y, pred):
+        precision, recall, f1, _ = precision_recall_fscore_support(
+            y, pred, labels=TIERS, average='macro', zero_division=0
+        )
+        return {
+            'accuracy': accuracy_score(y, pred),
+            'precision': precision,
+            'recall': recall,
+            'f1_score': f1,
+            'confusion_matrix': confusion_matrix(y, pred, labels=TIERS).tolist(),
+            'classification_report': classification_report(y, pred, labels=TIERS, target_names=TIER_LABELS,
+                                                            output_dict=True, zero_division=0),
+            'cv_method': 'Cohorte nueva',
+        }
+
+
+def imprimir_evaluacion(evaluacion):
+    """Resumen en consola de una evaluación multimodelo"""
+    print(f"\n🔀 Evaluación multimodelo: {evaluacion['n_filas']} participantes")
+
+    if 'results' in evaluacion:
+        print(f"\n{'Modelo':<25} {'Accuracy':<12} {'Precision':<12} {'F1-Score':<12}")
+        print(f"{'-'*60}")
+        for nombre, res in evaluacion['results'].items():
+            print(f"{nombre:<25} {res['accuracy']:.4f}      {res['precision']:.4f}      {res['f1_score']:.4f}")
+        print(f"\n🏆 Mejor Modelo: {evaluacion['best_model'].upper()}")
+
+    print(f"\n🤝 Acuerdo entre modelos:")
+    print(evaluacion['acuerdo'].round(4).to_string())
+    print(f"\n✅ Los 3 modelos coinciden en {evaluacion['unanimidad']*100:.2f}% de los casos")
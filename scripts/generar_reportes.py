@@ -12,14 +12,28 @@ from sklearn.metrics import confusion_matrix, classification_report
 import joblib
 import os
 import sys
+import argparse
+
+from instrumentacion import Tracer, agregar_argumentos, tracer_desde_args
+from evaluacion_multimodelo import EvaluadorMultimodelo, cargar_cohorte, imprimir_evaluacion
+from perfiles_render import guardar_figura, directorio_salida, agregar_argumentos as agregar_argumentos_render
+from dashboard_html import generar_dashboard
 
 # Configuración de estilo
 plt.style.use('seaborn-v0_8-darkgrid')
 sns.set_palette("husl")
 
 class ReportGenerator:
-    def __init__(self):
+    def __init__(self, evaluacion=None, perfil='publicacion'):
+        """
+        Args:
+            evaluacion: resultado de EvaluadorMultimodelo.evaluar(). Si trae métricas, todas
+                        las secciones (comparativa, mejor modelo, matriz de confusión, métricas
+                        por tier) usan las de la cohorte en vez de las de model_metadata.json
+            perfil: perfil de renderizado de perfiles_render.PERFILES
+        """
         self.output_dir = 'reportes_tesis'
+        self.perfil = perfil
         os.makedirs(self.output_dir, exist_ok=True)
         
         # ✅ DETECTAR SI ESTAMOS EN scripts/ O EN RAÍZ
@@ -43,41 +57,88 @@ class ReportGenerator:
         with open(metadata_path, 'r') as f:
             self.metadata = json.load(f)
         
+        self.evaluacion = evaluacion
+        self.metricas_en_vivo = evaluacion is not None and 'results' in evaluacion
+        if self.metricas_en_vivo:
+            self.resultados_modelos = evaluacion['results']
+            self.best_model_name = evaluacion['best_model']
+            self.metodo_metricas = f"Cohorte nueva ({evaluacion['n_filas']} participantes, métricas en vivo)"
+            model_path = os.path.join(os.path.dirname(model_path), f'{self.best_model_name}.joblib')
+        else:
+            self.resultados_modelos = self.metadata['results']
+            self.best_model_name = self.metadata['best_model']
+            self.metodo_metricas = self.metadata['validation_method']
+        
         # Cargar mejor modelo
         self.best_model = joblib.load(model_path)
         
         print(f"✅ Datos cargados:  {len(self.df)} participantes")
     
-    def generar_reporte_completo(self):
-        """Genera todos los reportes y gráficos"""
+    def generar_reporte_completo(self, tracer=None, graficos=True, dashboard=False):
+        """
+        Genera todos los reportes y gráficos
+        
+        Args:
+            graficos: si es False se omiten las figuras de matplotlib (solo texto/dashboard)
+            dashboard: genera además el dashboard HTML
+        """
+        if tracer is None:
+            tracer = Tracer()
+
         print("\n" + "="*70)
         print("📊 GENERATING PROFESSIONAL REPORTS FOR THESIS")
         print("="*70)
         
-        # 1. Distribución de datos
-        self.plot_distribucion_tiers()
-        
-        # 2. Comparativa de modelos
-        self.plot_comparativa_modelos()
-        
-        # 3. Matriz de confusión
-        self. plot_confusion_matrix()
-        
-        # 4. Feature Importance
-        self.plot_feature_importance()
+        # (nombre, paso, filas): filas devuelve las filas que procesa el paso, o es None
+        # si el paso solo trabaja con métricas ya agregadas
+        pasos = []
+        if graficos:
+            pasos += self._pasos_graficos()
         
-        # 5. Análisis de métricas por feature
-        self.plot_features_por_tier()
+        # 7. Reporte escrito
+        pasos.append(('7_reporte_texto', self.generar_reporte_texto, self._filas_datos))
         
-        # 6. Curvas de aprendizaje
-        self. plot_performance_metrics()
+        if dashboard:
+            # 8. Dashboard HTML
+            pasos.append(('8_dashboard_html', self.generar_dashboard_html, self._filas_datos))
         
-        # 7. Reporte escrito
-        self.generar_reporte_texto()
+        for nombre, paso, filas in pasos:
+            with tracer.etapa(nombre, categoria='reportes') as m:
+                paso()
+                if filas is not None:
+                    m['filas'] = filas()
         
         print(f"\n✅ All reports saved in: {self.output_dir}/")
+        if graficos and directorio_salida(self.output_dir, self.perfil) != self.output_dir:
+            print(f"🖼️  Figures ({self.perfil}) saved in: {directorio_salida(self.output_dir, self.perfil)}/")
         print("="*70)
     
+    def _pasos_graficos(self):
+        """Pasos 1-6: figuras de matplotlib"""
+        pasos = [
+            # 1. Distribución de datos
+            ('1_distribucion_tiers', self.plot_distribucion_tiers, self._filas_datos),
+            # 2. Comparativa de modelos
+            ('2_comparativa_modelos', self.plot_comparativa_modelos, None),
+        ]
+        if self.evaluacion is not None:
+            # 2b. Acuerdo entre modelos (solo con evaluación en vivo)
+            pasos.append(('2b_acuerdo_modelos', self.plot_acuerdo_modelos, lambda: self.evaluacion['n_filas']))
+        pasos += [
+            # 3. Matriz de confusión
+            ('3_matriz_confusion', self.plot_confusion_matrix, None),
+            # 4. Feature Importance
+            ('4_feature_importance', self.plot_feature_importance, None),
+            # 5. Análisis de métricas por feature
+            ('5_features_por_tier', self.plot_features_por_tier, self._filas_datos),
+            # 6. Curvas de aprendizaje
+            ('6_metricas_por_tier', self.plot_performance_metrics, None),
+        ]
+        return pasos
+    
+    def _filas_datos(self):
+        return len(self.df)
+    
     def plot_distribucion_tiers(self):
         """Gráfico de distribución de participantes por tier"""
         fig, axes = plt.subplots(1, 2, figsize=(14, 5))
@@ -103,13 +164,13 @@ class ReportGenerator:
         axes[1].set_title('Participant Proportion', fontsize=14, fontweight='bold')
         
         plt. tight_layout()
-        plt.savefig(f'{self. output_dir}/1_distribucion_tiers.png', dpi=300, bbox_inches='tight')
+        guardar_figura(f'{self.output_dir}/1_distribucion_tiers.png', self.perfil)
         print("  ✅ Graph 1: Tier distribution")
         plt.close()
     
     def plot_comparativa_modelos(self):
         """Comparativa de rendimiento de los 3 modelos"""
-        results = self.metadata['results']
+        results = self.resultados_modelos
         
         models = list(results.keys())
         metrics = ['accuracy', 'precision', 'recall', 'f1_score']
@@ -130,25 +191,49 @@ class ReportGenerator:
         ax.set_ylabel('Percentage (%)', fontsize=12, fontweight='bold')
         ax.set_title('Supervised Learning Model Comparison', fontsize=14, fontweight='bold')
         ax.set_xticks(x + width * 1.5)
-        ax.set_xticklabels(['Logistic\nRegression', 'Random\nForest', 'Linear\nSVM'])
+        ax.set_xticklabels([m.replace('_', '\n').title().replace('Svm', 'SVM') for m in models])
         ax.legend(loc='lower right', fontsize=10)
         ax.grid(axis='y', alpha=0.3)
-        ax.set_ylim([75, 95])
+        valores = [results[m][metric] * 100 for m in models for metric in metrics]
+        ax.set_ylim([min(75, min(valores) - 5), max(95, min(100, max(valores) + 2))])
         
         # Añadir línea del mejor modelo
         best_acc = max([results[m]['accuracy'] for m in models]) * 100
         ax.axhline(y=best_acc, color='red', linestyle='--', linewidth=2, alpha=0.5)
         
         plt.tight_layout()
-        plt.savefig(f'{self.output_dir}/2_comparativa_modelos.png', dpi=300, bbox_inches='tight')
+        guardar_figura(f'{self.output_dir}/2_comparativa_modelos.png', self.perfil)
         print("  ✅ Graph 2: Model comparison")
         plt.close()
     
+    def plot_acuerdo_modelos(self):
+        """Matriz de acuerdo entre modelos sobre la cohorte evaluada"""
+        acuerdo = self.evaluacion['acuerdo'] * 100
+        etiquetas = [m.replace('_', ' ').title() for m in acuerdo.index]
+        
+        fig, ax = plt.subplots(figsize=(8, 6))
+        
+        sns.heatmap(acuerdo, annot=True, fmt='.1f', cmap='Greens', vmin=0, vmax=100,
+                   cbar_kws={'label': 'Agreement (%)'},
+                   xticklabels=etiquetas, yticklabels=etiquetas,
+                   ax=ax, annot_kws={'fontsize': 12, 'fontweight': 'bold'})
+        
+        ax.set_title(f'Model Agreement - {self.evaluacion["n_filas"]} participants\n' +
+                    f'Unanimous: {self.evaluacion["unanimidad"]*100:.1f}%',
+                    fontsize=14, fontweight='bold')
+        
+        plt.tight_layout()
+        guardar_figura(f'{self.output_dir}/2b_acuerdo_modelos.png', self.perfil)
+        print("  ✅ Graph 2b: Model agreement")
+        plt.close()
+    
+    def _sufijo_titulo(self):
+        return ' (new cohort)' if self.metricas_en_vivo else ''
+    
     def plot_confusion_matrix(self):
         """Matriz de confusión del mejor modelo"""
-        # Obtener matriz de confusión del metadata
-        best_model_name = self.metadata['best_model']
-        cm = np.array(self.metadata['results'][best_model_name]['confusion_matrix'])
+        best_model_name = self.best_model_name
+        cm = np.array(self.resultados_modelos[best_model_name]['confusion_matrix'])
         
         fig, ax = plt.subplots(figsize=(10, 8))
         
@@ -159,8 +244,8 @@ class ReportGenerator:
         
         ax.set_xlabel('Prediction', fontsize=13, fontweight='bold')
         ax.set_ylabel('Actual Value', fontsize=13, fontweight='bold')
-        ax.set_title(f'Confusion Matrix - {best_model_name.replace("_", " ").title()}\n' + 
-                    f'Accuracy: {self.metadata["results"][best_model_name]["accuracy"]*100:.2f}%',
+        ax.set_title(f'Confusion Matrix - {best_model_name.replace("_", " ").title()}{self._sufijo_titulo()}\n' + 
+                    f'Accuracy: {self.resultados_modelos[best_model_name]["accuracy"]*100:.2f}%',
                     fontsize=14, fontweight='bold')
         
         # Calcular accuracy por tier
@@ -170,7 +255,7 @@ class ReportGenerator:
                    fontsize=11, fontweight='bold', va='center')
         
         plt.tight_layout()
-        plt.savefig(f'{self.output_dir}/3_matriz_confusion.png', dpi=300, bbox_inches='tight')
+        guardar_figura(f'{self.output_dir}/3_matriz_confusion.png', self.perfil)
         print("  ✅ Graph 3: Confusion matrix")
         plt.close()
     
@@ -213,7 +298,7 @@ class ReportGenerator:
                        f'{imp*100:.1f}%', va='center', fontsize=10, fontweight='bold')
             
             plt.tight_layout()
-            plt.savefig(f'{self.output_dir}/4_feature_importance.png', dpi=300, bbox_inches='tight')
+            guardar_figura(f'{self.output_dir}/4_feature_importance.png', self.perfil)
             print("  ✅ Graph 4: Feature importance")
             plt.close()
     
@@ -248,14 +333,14 @@ class ReportGenerator:
         
         plt.suptitle('Feature Analysis by Tier', fontsize=15, fontweight='bold', y=1.00)
         plt.tight_layout()
-        plt.savefig(f'{self.output_dir}/5_features_por_tier.png', dpi=300, bbox_inches='tight')
+        guardar_figura(f'{self.output_dir}/5_features_por_tier.png', self.perfil)
         print("  ✅ Graph 5: Features by tier")
         plt.close()
     
     def plot_performance_metrics(self):
         """Métricas de performance detalladas"""
-        best_model_name = self.metadata['best_model']
-        report = self.metadata['results'][best_model_name]['classification_report']
+        best_model_name = self.best_model_name
+        report = self.resultados_modelos[best_model_name]['classification_report']
         
         tiers = ['Low', 'Medium', 'High']
         metrics = ['precision', 'recall', 'f1-score']
@@ -280,7 +365,7 @@ class ReportGenerator:
         
         ax.set_xlabel('Tier', fontsize=12, fontweight='bold')
         ax.set_ylabel('Percentage (%)', fontsize=12, fontweight='bold')
-        ax.set_title(f'Performance Metrics by Tier - {best_model_name. replace("_", " ").title()}',
+        ax.set_title(f'Performance Metrics by Tier - {best_model_name. replace("_", " ").title()}{self._sufijo_titulo()}',
                     fontsize=14, fontweight='bold')
         ax.set_xticks(x + width)
         ax.set_xticklabels(tiers)
@@ -289,14 +374,18 @@ class ReportGenerator:
         ax.set_ylim([0, 105])
         
         plt.tight_layout()
-        plt.savefig(f'{self.output_dir}/6_metricas_por_tier.png', dpi=300, bbox_inches='tight')
+        guardar_figura(f'{self.output_dir}/6_metricas_por_tier.png', self.perfil)
         print("  ✅ Graph 6: Metrics by tier")
         plt.close()
     
     def generar_reporte_texto(self):
         """Genera reporte en texto para la tesis"""
-        best_model_name = self.metadata['best_model']
-        results = self.metadata['results'][best_model_name]
+        best_model_name = self.best_model_name
+        results = self.resultados_modelos[best_model_name]
+        if 'accuracy_std' in results:
+            accuracy = f"{results['accuracy']*100:.2f}% ± {results['accuracy_std']*100:.2f}%"
+        else:
+            accuracy = f"{results['accuracy']*100:.2f}%"
         
         reporte = f"""
 {'='*80}
@@ -317,11 +406,12 @@ REPORTE DE RESULTADOS - SISTEMA DE PREDICCIÓN DE SKILL TIER
 {'─'*80}
    Algoritmo: {best_model_name. replace('_', ' ').title()}
    Método de Validación: {self.metadata['validation_method']}
+   Métricas Reportadas: {self.metodo_metricas}
    Fecha de Entrenamiento: {self.metadata['training_date']}
 
 3. MÉTRICAS GLOBALES
 {'─'*80}
-   Accuracy:    {results['accuracy']*100:.2f}% ± {results['accuracy_std']*100:.2f}%
+   Accuracy:    {accuracy}
    Precision (macro): {results['precision']*100:.2f}%
    Recall (macro): {results['recall']*100:.2f}%
    F1-Score (macro): {results['f1_score']*100:.2f}%
@@ -350,7 +440,7 @@ REPORTE DE RESULTADOS - SISTEMA DE PREDICCIÓN DE SKILL TIER
 {'─'*80}
 """
         
-        for model_name, model_results in self.metadata['results'].items():
+        for model_name, model_results in self.resultados_modelos.items():
             reporte += f"""
    {model_name.replace('_', ' ').title()}:
      Accuracy:  {model_results['accuracy']*100:.2f}%
@@ -373,7 +463,88 @@ END OF REPORT
         # También imprimir en consola
         print(reporte)
 
+    def datos_dashboard(self):
+        """Agrega los datos de todos los gráficos en un dict serializable a JSON"""
+        best_model_name = self.best_model_name
+        best_results = self.resultados_modelos[best_model_name]
+        tier_labels = ['Low', 'Medium', 'High']
+        
+        tier_counts = self.df['tier'].value_counts().reindex([0, 1, 2], fill_value=0)
+        
+        histogramas = {}
+        for feature in ['reaction_ms_mean', 'aim_accuracy', 'cpm', 'mean_time_to_hit_ms']:
+            bordes = np.histogram_bin_edges(self.df[feature], bins=30)
+            histogramas[feature] = {
+                'bordes': bordes,
+                'por_tier': [np.histogram(self.df.loc[self.df['tier'] == tier, feature], bins=bordes)[0]
+                             for tier in [0, 1, 2]],
+            }
+        
+        datos = {
+            'n_participantes': len(self.df),
+            'tiers': {'labels': tier_labels, 'conteos': tier_counts.values},
+            'metricas': ['accuracy', 'precision', 'recall', 'f1_score'],
+            'modelos': {
+                nombre: {m: res[m] for m in ['accuracy', 'precision', 'recall', 'f1_score']}
+                for nombre, res in self.resultados_modelos.items()
+            },
+            'best_model': best_model_name,
+            'metodo_metricas': self.metodo_metricas,
+            'confusion_matrix': best_results['confusion_matrix'],
+            'reporte_por_tier': {t: best_results['classification_report'][t] for t in tier_labels},
+            'histogramas': histogramas,
+            'feature_importance': None,
+            'acuerdo': None,
+        }
+        
+        if hasattr(self.best_model, 'feature_importances_'):
+            datos['feature_importance'] = {
+                'features': list(self.df.columns.drop('tier')),
+                'valores': self.best_model.feature_importances_,
+            }
+        
+        if self.evaluacion is not None:
+            datos['acuerdo'] = {
+                'modelos': list(self.evaluacion['acuerdo'].index),
+                'matriz': self.evaluacion['acuerdo'].values,
+            }
+        
+        return datos
+    
+    def generar_dashboard_html(self):
+        """Dashboard HTML con los datos agregados incrustados (gráficos en el navegador)"""
+        ruta = generar_dashboard(self.datos_dashboard(), f'{self.output_dir}/dashboard.html')
+        print(f"  ✅ HTML dashboard: {ruta}")
+
 # Ejecutar
 if __name__ == '__main__':
-    generator = ReportGenerator()
-    generator.generar_reporte_completo()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Genera los reportes y gráficos de la tesis')
+    parser.add_argument('--cohorte', metavar='CSV', default=None,
+                        help='Compara los modelos guardados evaluándolos en vivo sobre esta cohorte')
+    parser.add_argument('--dashboard', action='store_true',
+                        help='Genera además reportes_tesis/dashboard.html')
+    parser.add_argument('--solo-dashboard', action='store_true',
+                        help='Omite las figuras PNG/SVG y genera solo el texto y el dashboard HTML')
+    agregar_argumentos_render(parser)
+    agregar_argumentos(parser)
+    args = parser.parse_args()
+    tracer = tracer_desde_args(args)
+
+    tracer.iniciar()
+    try:
+        evaluacion = None
+        if args.cohorte:
+            with tracer.etapa('0_evaluacion_multimodelo', categoria='reportes') as m:
+                X, y = cargar_cohorte(args.cohorte)
+                models_dir = 'data/models' if os.path.exists('data/models') else '../data/models'
+                evaluacion = EvaluadorMultimodelo(models_dir).evaluar(X, y)
+                imprimir_evaluacion(evaluacion)
+                m['filas'] = len(X)
+        
+        with tracer.etapa('0_carga_datos', categoria='reportes') as m:
+            generator = ReportGenerator(evaluacion, args.perfil)
+            m['filas'] = len(generator.df)
+        generator.generar_reporte_completo(tracer, graficos=not args.solo_dashboard,
+                                           dashboard=args.dashboard or args.solo_dashboard)
+    finally:
+        tracer.finalizar()
\ No newline at end of file
@@ -0,0 +1,178 @@
+"""
+Instrumentación ligera del pipeline
+Tiempos por etapa, pico de memoria (RSS), filas procesadas y perfilado opcional.
+El resultado es un trace JSON en formato Chrome (abrir en chrome://tracing o ui.perfetto.dev)
+"""
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows no tiene el módulo resource
+    resource = None
+
+PROFILERS = ('cprofile', 'pyinstrument')
+
+
+def pico_rss_mb():
+    """Pico de memoria residente del proceso en MB (None si no está disponible)"""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KB, macOS reporta bytes
+    if sys.platform == 'darwin':
+        return pico / (1024 * 1024)
+    return pico / 1024
+
+
+class Tracer:
+    """
+    Registra etapas del pipeline como eventos de un trace Chrome.
+
+    Sin trace_path el tracer queda desactivado: etapa() solo cede un dict
+    vacío y no mide nada, así que el costo es despreciable.
+    """
+
+    def __init__(self, trace_path=None, profiler=None):
+        if profiler is not None and profiler not in PROFILERS:
+            raise ValueError(f"Profiler no soportado: {profiler}. Opciones: {', '.join(PROFILERS)}")
+        if profiler is not None and trace_path is None:
+            raise ValueError("El perfilado requiere un trace_path donde guardar los resultados")
+
+        self.trace_path = trace_path
+        self.activo = trace_path is not None
+        self.profiler_nombre = profiler
+        self.eventos = []
+        self._profiler = None
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter()
+
+    @property
+    def perfilando(self):
+        """True si hay un profiler (cProfile/pyinstrument) configurado"""
+        return self.profiler_nombre is not None
+
+    def _ts_us(self):
+        return (time.perf_counter() - self._t0) * 1e6
+
+    @contextmanager
+    def etapa(self, nombre, categoria='pipeline'):
+        """
+        Mide una etapa. El dict cedido permite registrar métricas propias:
+
+            with tracer.etapa('paso1_carga') as m:
+                df = pd.read_csv(path)
+                m['filas'] = len(df)
+        """
+        metricas = {}
+        if not self.activo:
+            yield metricas
+            return
+
+        rss_inicio = pico_rss_mb()
+        inicio = self._ts_us()
+        try:
+            yield metricas
+        finally:
+            fin = self._ts_us()
+            rss_fin = pico_rss_mb()
+            args = dict(metricas)
+            if rss_fin is not None:
+                args['rss_pico_mb'] = round(rss_fin, 2)
+                args['rss_pico_delta_mb'] = round(rss_fin - rss_inicio, 2)
+
+            evento = {
+                'name': nombre,
+                'cat': categoria,
+                'ph': 'X',
+                'ts': inicio,
+                'dur': fin - inicio,
+                'pid': os.getpid(),
+                'tid': threading.get_ident(),
+                'args': args,
+            }
+            with self._lock:
+                self.eventos.append(evento)
+                if rss_fin is not None:
+                    self.eventos.append({
+                        'name': 'rss_pico_mb',
+                        'ph': 'C',
+                        'ts': fin,
+                        'pid': os.getpid(),
+                        'args': {'MB': round(rss_fin, 2)},
+                    })
+
+    def iniciar(self):
+        """Arranca el profiler opcional (cProfile o pyinstrument)"""
+        if self.profiler_nombre == 'cprofile':
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif self.profiler_nombre == 'pyinstrument':
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                raise ImportError("❌ pyinstrument no está instalado. Ejecuta: pip install pyinstrument")
+            self._profiler = Profiler()
+            self._profiler.start()
+
+    def finalizar(self):
+        """Detiene el profiler, guarda el trace y muestra el resumen"""
+        if not self.activo:
+            return
+
+        directorio = os.path.dirname(self.trace_path)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+        base = os.path.splitext(self.trace_path)[0]
+        if self.profiler_nombre == 'cprofile':
+            self._profiler.disable()
+            self._profiler.dump_stats(f'{base}.prof')
+            print(f"📈 Perfil cProfile guardado en: {base}.prof")
+        elif self.profiler_nombre == 'pyinstrument':
+            self._profiler.stop()
+            with open(f'{base}.html', 'w', encoding='utf-8') as f:
+                f.write(self._profiler.output_html())
+            print(f"📈 Perfil pyinstrument guardado en: {base}.html")
+        self._profiler = None
+
+        with open(self.trace_path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': self.eventos, 'displayTimeUnit': 'ms'}, f)
+
+        self.imprimir_resumen()
+        print(f"🧭 Trace guardado en: {self.trace_path}")
+
+    def imprimir_resumen(self):
+        """Tabla de tiempos y memoria por etapa"""
+        etapas = [e for e in self.eventos if e['ph'] == 'X']
+        if not etapas:
+            return
+
+        print(f"\n⏱️  Perfil por etapa:")
+        print(f"{'Etapa':<30} {'Tiempo (s)':>11} {'Filas':>10} {'RSS pico (MB)':>14}")
+        print(f"{'-'*68}")
+        for e in etapas:
+            filas = e['args'].get('filas', '')
+            rss = e['args'].get('rss_pico_mb', '')
+            print(f"{e['name']:<30} {e['dur'] / 1e6:>11.3f} {filas!s:>10} {rss!s:>14}")
+
+
+def agregar_argumentos(parser):
+    """Agrega --trace y --profile a un ArgumentParser"""
+    parser.add_argument('--trace', metavar='RUTA', default=None,
+                        help='Guarda un trace JSON (formato Chrome) con tiempos y memoria por etapa')
+    parser.add_argument('--profile', choices=PROFILERS, default=None,
+                        help='Perfilado adicional del proceso completo (requiere --trace)')
+
+
+def tracer_desde_args(args):
+    """Construye un Tracer a partir de los argumentos de agregar_argumentos()"""
+    if args.profile and not args.trace:
+        raise SystemExit("❌ --profile requiere --trace")
+    return Tracer(args.trace, args.profile)
+
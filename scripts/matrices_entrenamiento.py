@@ -0,0 +1,97 @@
+"""
+Matrices de entrenamiento compactas
+X en float32 contiguo (orden C), tier en int8 y, opcionalmente, filas duplicadas
+colapsadas en una sola con su conteo como peso de muestra
+"""
+import inspect
+
+import numpy as np
+import pandas as pd
+
+FEATURES = [
+    'reaction_ms_mean', 'reaction_ms_std', 'false_starts',
+    'aim_accuracy', 'mean_time_to_hit_ms', 'miss_rate',
+    'cpm', 'error_rate', 'test_duration_s'
+]
+
+
+def acepta_sample_weight(funcion):
+    """True si funcion (p. ej. ModelTrainer.train_all_models) acepta sample_weight="""
+    parametros = inspect.signature(funcion).parameters.values()
+    return any(p.name == 'sample_weight' or p.kind == p.VAR_KEYWORD for p in parametros)
+
+
+class MatricesEntrenamiento:
+    """
+    X, y (y pesos si se deduplicó) listos para pasarse tal cual a los estimadores.
+
+    Atributos:
+        X: np.ndarray float32 (n_filas, n_features), C-contiguo
+        y: np.ndarray int8 (n_filas,)
+        pesos: np.ndarray float32 (n_filas,) con el número de repeticiones, o None
+        features: nombres de columnas de X
+        filas_originales: filas antes de deduplicar
+    """
+
+    def __init__(self, X, y, features, pesos=None, filas_originales=None):
+        self.X = X
+        self.y = y
+        self.features = list(features)
+        self.pesos = pesos
+        self.filas_originales = filas_originales if filas_originales is not None else len(y)
+
+    def __len__(self):
+        return len(self.y)
+
+    @property
+    def nbytes(self):
+        total = self.X.nbytes + self.y.nbytes
+        if self.pesos is not None:
+            total += self.pesos.nbytes
+        return total
+
+    @classmethod
+    def desde_dataframe(cls, df, features=FEATURES, target='tier', deduplicar=False):
+        """Construye las matrices columna a columna sobre un único buffer float32"""
+        X = np.empty((len(df), len(features)), dtype=np.float32, order='C')
+        for j, col in enumerate(features):
+            X[:, j] = df[col].to_numpy()
+        y = df[target].to_numpy(dtype=np.int8)
+
+        datos = cls(X, y, features)
+        if deduplicar:
+            datos = datos.deduplicar()
+        return datos
+
+    @classmethod
+    def desde_csv(cls, path, features=FEATURES, target='tier', deduplicar=False):
+        """Lee el CSV procesado directamente en float32/int8 (sin pasar por float64)"""
+        dtypes = {col: np.float32 for col in features}
+        dtypes[target] = np.int8
+        df = pd.read_csv(path, usecols=list(features) + [target], dtype=dtypes)
+        return cls.desde_dataframe(df, features, target, deduplicar)
+
+    def deduplicar(self):
+        """
+        Colapsa filas idénticas (mismas features y mismo tier) en una sola,
+        con su número de apariciones como peso de muestra
+        """
+        if self.pesos is not None:
+            # Ya está deduplicado
+            return self
+
+        filas = np.empty((len(self.y), self.X.shape[1] + 1), dtype=np.float32)
+        filas[:, :-1] = self.X
+        filas[:, -1] = self.y
+        unicas, conteos = np.unique(filas, axis=0, return_counts=True)
+
+        X = np.ascontiguousarray(unicas[:, :-1])
+        y = unicas[:, -1].astype(np.int8)
+        pesos = conteos.astype(np.float32)
+        return MatricesEntrenamiento(X, y, self.features, pesos, self.filas_originales)
+
+    def resumen(self):
+        texto = f"{len(self)} filas × {self.X.shape[1]} features ({self.nbytes / 1024 ** 2:.2f} MB)"
+        if self.pesos is not None:
+            texto += f", {self.filas_originales - len(self)} duplicados colapsados"
+        return texto
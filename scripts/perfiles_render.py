@@ -0,0 +1,49 @@
+"""
+Perfiles de renderizado de figuras
+'publicacion' reproduce la salida de la tesis (PNG 300 dpi con bbox ajustado);
+'preview' y 'svg' omiten el ajuste de bbox para iterar rápido sobre los reportes y
+escriben en su propio subdirectorio para no pisar las figuras versionadas de la tesis
+"""
+import os
+
+import matplotlib.pyplot as plt
+
+PERFILES = {
+    'publicacion': {'formato': 'png', 'dpi': 300, 'bbox_inches': 'tight', 'subdirectorio': None},
+    'preview': {'formato': 'png', 'dpi': 72, 'bbox_inches': None, 'subdirectorio': 'preview'},
+    'svg': {'formato': 'svg', 'dpi': 72, 'bbox_inches': None, 'subdirectorio': 'svg'},
+}
+
+
+def directorio_salida(directorio, perfil='publicacion'):
+    """Directorio donde el perfil guarda las figuras (p. ej. reportes_tesis/preview)"""
+    subdirectorio = PERFILES[perfil]['subdirectorio']
+    return os.path.join(directorio, subdirectorio) if subdirectorio else directorio
+
+
+def guardar_figura(ruta, perfil='publicacion', fig=None):
+    """
+    Guarda la figura actual (o fig) según el perfil.
+    La extensión de ruta se reemplaza por la del formato del perfil y, fuera de
+    'publicacion', el archivo va al subdirectorio del perfil.
+    Devuelve la ruta final.
+    """
+    if perfil not in PERFILES:
+        raise ValueError(f"Perfil desconocido: {perfil}. Opciones: {', '.join(PERFILES)}")
+    config = PERFILES[perfil]
+
+    directorio, archivo = os.path.split(ruta)
+    directorio = directorio_salida(directorio, perfil)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    ruta = os.path.join(directorio, f"{os.path.splitext(archivo)[0]}.{config['formato']}")
+    destino = fig if fig is not None else plt
+    destino.savefig(ruta, format=config['formato'], dpi=config['dpi'], bbox_inches=config['bbox_inches'])
+    return ruta
+
+
+def agregar_argumentos(parser):
+    """Agrega --perfil a un ArgumentParser"""
+    parser.add_argument('--perfil', choices=list(PERFILES), default='publicacion',
+                        help='publicacion: PNG 300 dpi | preview: PNG 72 dpi sin bbox ajustado | svg: vectorial '
+                             '(preview y svg se guardan en reportes_tesis/<perfil>/)')
@@ -6,8 +6,11 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 from matplotlib.patches import FancyBboxPatch
+import argparse
 
-def visualizar_pipeline():
+from perfiles_render import guardar_figura, agregar_argumentos
+
+def visualizar_pipeline(perfil='publicacion'):
     """Genera diagrama visual del pipeline"""
     fig, ax = plt.subplots(figsize=(14, 10))
     ax.set_xlim(0, 10)
@@ -98,9 +101,11 @@ def visualizar_pipeline():
            fontsize=15, fontweight='bold')
     
     plt.tight_layout()
-    plt.savefig('reportes_tesis/PIPELINE_PROCESAMIENTO.png', dpi=300, bbox_inches='tight')
+    guardar_figura('reportes_tesis/PIPELINE_PROCESAMIENTO.png', perfil)
     print("✅ Diagrama del pipeline generado")
     plt.close()
 
 if __name__ == '__main__': 
-    visualizar_pipeline()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Diagrama del pipeline de procesamiento')
+    agregar_argumentos(parser)
+    visualizar_pipeline(parser.parse_args().perfil)
\ No newline at end of file
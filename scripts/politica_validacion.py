@@ -0,0 +1,231 @@
+"""
+Política de validación adaptativa
+LOOCV para muestras pequeñas (estudio piloto) y Repeated Stratified K-Fold a partir
+de un umbral de filas, con submuestreo estratificado y balanceado por tier opcional.
+
+LOOCV lo ejecuta el propio ModelTrainer (use_loocv=True). El k-fold se ejecuta aquí,
+sobre los modelos y el scaler que guardó el trainer, porque ModelTrainer solo acepta
+(X, y, use_loocv=...)
+"""
+import json
+import os
+import shutil
+
+import joblib
+import numpy as np
+from sklearn.base import clone
+from sklearn.metrics import (accuracy_score, precision_recall_fscore_support,
+                             confusion_matrix, classification_report)
+from sklearn.model_selection import LeaveOneOut, RepeatedStratifiedKFold
+from sklearn.pipeline import Pipeline
+
+from matrices_entrenamiento import MatricesEntrenamiento
+
+TIERS = (0, 1, 2)
+TIER_LABELS = ['Low', 'Medium', 'High']
+MODELOS = ('logistic_regression', 'random_forest', 'linear_svm')
+
+
+def _filas_representadas(datos):
+    """Filas originales que representan las matrices (la suma de pesos si se deduplicó)"""
+    return int(datos.pesos.sum()) if datos.pesos is not None else len(datos)
+
+
+class PoliticaValidacion:
+    def __init__(self, max_filas_loocv=1000, n_splits=5, n_repeats=3, max_por_tier=None, random_state=42):
+        """
+        Args:
+            max_filas_loocv: por encima de este número de filas se usa k-fold en vez de LOOCV
+            n_splits, n_repeats: configuración del Repeated Stratified K-Fold
+            max_por_tier: si se indica, se entrena con a lo sumo esta cantidad de filas por tier
+            random_state: semilla del submuestreo y de los folds
+        """
+        if n_splits < 2:
+            raise ValueError("n_splits debe ser al menos 2")
+        self.max_filas_loocv = max_filas_loocv
+        self.n_splits = n_splits
+        self.n_repeats = n_repeats
+        self.max_por_tier = max_por_tier
+        self.random_state = random_state
+
+    def parametros(self):
+        """Configuración de la política (forma parte de la huella del checkpoint de entrenamiento)"""
+        return {
+            'max_filas_loocv': self.max_filas_loocv,
+            'n_splits': self.n_splits,
+            'n_repeats': self.n_repeats,
+            'max_por_tier': self.max_por_tier,
+            'random_state': self.random_state,
+        }
+
+    def submuestrear(self, datos):
+        """
+        Toma hasta max_por_tier filas de cada tier (sin reemplazo, orden original).
+        Con datos deduplicados el tope se aplica a la suma de pesos: se sortean filas
+        originales y cada fila única conserva cuántas de sus copias salieron
+        """
+        if self.max_por_tier is None:
+            return datos
+
+        rng = np.random.default_rng(self.random_state)
+        indices, pesos = [], []
+        for tier in TIERS:
+            idx_tier = np.flatnonzero(datos.y == tier)
+            if datos.pesos is None:
+                if len(idx_tier) > self.max_por_tier:
+                    idx_tier = rng.choice(idx_tier, self.max_por_tier, replace=False)
+                indices.append(idx_tier)
+                continue
+
+            pesos_tier = datos.pesos[idx_tier].astype(np.int64)
+            if pesos_tier.sum() > self.max_por_tier:
+                pesos_tier = rng.multivariate_hypergeometric(pesos_tier, self.max_por_tier)
+            indices.append(idx_tier[pesos_tier > 0])
+            pesos.append(pesos_tier[pesos_tier > 0])
+
+        orden = np.argsort(np.concatenate(indices), kind='stable')
+        indices = np.concatenate(indices)[orden]
+
+        if datos.pesos is None:
+            if len(indices) == len(datos):
+                return datos
+            return MatricesEntrenamiento(datos.X[indices], datos.y[indices], datos.features,
+                                         None, datos.filas_originales)
+
+        pesos = np.concatenate(pesos)[orden].astype(datos.pesos.dtype)
+        if np.array_equal(indices, np.arange(len(datos))) and np.array_equal(pesos, datos.pesos):
+            return datos
+        return MatricesEntrenamiento(datos.X[indices], datos.y[indices], datos.features,
+                                     pesos, datos.filas_originales)
+
+    def elegir(self, n_filas):
+        """Describe la estrategia para n_filas (se guarda en model_metadata.json)"""
+        if n_filas <= self.max_filas_loocv:
+            return {
+                'usar_loocv': True,
+                'validation_method': 'Leave-One-Out Cross-Validation (LOOCV)',
+                'cv_method': 'LOOCV',
+            }
+        return {
+            'usar_loocv': False,
+            'validation_method': f'Repeated Stratified {self.n_splits}-Fold Cross-Validation '
+                                 f'({self.n_repeats} repeticiones)',
+            'cv_method': f'RepeatedStratifiedKFold({self.n_splits}x{self.n_repeats})',
+        }
+
+    def splitter(self, n_filas):
+        if n_filas <= self.max_filas_loocv:
+            return LeaveOneOut()
+        return RepeatedStratifiedKFold(n_splits=self.n_splits, n_repeats=self.n_repeats,
+                                       random_state=self.random_state)
+
+    def preparar(self, datos):
+        """
+        Aplica el submuestreo y elige la estrategia.
+        Devuelve (datos, estrategia), donde estrategia incluye el splitter a usar.
+        """
+        filas_entrada = _filas_representadas(datos)
+        datos = self.submuestrear(datos)
+
+        estrategia = self.elegir(len(datos))
+        estrategia['cv'] = self.splitter(len(datos))
+        estrategia['filas_entrenamiento'] = len(datos)
+        estrategia['filas_submuestreadas'] = filas_entrada - _filas_representadas(datos)
+        estrategia['max_por_tier'] = self.max_por_tier
+        return datos, estrategia
+
+
+def validar_kfold(models_dir, datos, estrategia, modelos=MODELOS):
+    """
+    Repeated Stratified K-Fold sobre clones del scaler y de cada modelo guardado.
+    Devuelve métricas por modelo con las mismas claves que model_metadata.json;
+    matriz de confusión y soporte se promedian entre repeticiones.
+    """
+    splitter = estrategia['cv']
+    n_repeats = splitter.n_repeats
+    scaler = joblib.load(os.path.join(models_dir, 'scaler.joblib'))
+    X, y, pesos = datos.X, datos.y, datos.pesos
+
+    results = {}
+    for nombre in modelos:
+        modelo = joblib.load(os.path.join(models_dir, f'{nombre}.joblib'))
+        y_true, y_pred, w_total, acc_folds = [], [], [], []
+
+        for train_idx, test_idx in splitter.split(X, y):
+            pipeline = Pipeline([('scaler', clone(scaler)), ('modelo', clone(modelo))])
+            fit_params = {}
+            if pesos is not None:
+                fit_params['modelo__sample_weight'] = pesos[train_idx]
+            pipeline.fit(X[train_idx], y[train_idx], **fit_params)
+
+            pred = pipeline.predict(X[test_idx])
+            w = pesos[test_idx] if pesos is not None else None
+            acc_folds.append(accuracy_score(y[test_idx], pred, sample_weight=w))
+            y_true.append(y[test_idx])
+            y_pred.append(pred)
+            w_total.append(w if w is not None else np.ones(len(test_idx), dtype=np.float32))
+
+        y_true = np.concatenate(y_true)
+        y_pred = np.concatenate(y_pred)
+        w_total = np.concatenate(w_total)
+
+        precision, recall, f1, _ = precision_recall_fscore_support(
+            y_true, y_pred, labels=list(TIERS), average='macro', sample_weight=w_total, zero_division=0
+        )
+        reporte = classification_report(
+            y_true, y_pred, labels=list(TIERS), target_names=TIER_LABELS,
+            sample_weight=w_total, output_dict=True, zero_division=0
+        )
+        for clave in TIER_LABELS + ['macro avg', 'weighted avg']:
+            reporte[clave]['support'] = reporte[clave]['support'] / n_repeats
+        cm = confusion_matrix(y_true, y_pred, labels=list(TIERS), sample_weight=w_total)
+
+        results[nombre] = {
+            'accuracy': accuracy_score(y_true, y_pred, sample_weight=w_total),
+            'accuracy_std': float(np.std(acc_folds)),
+            'precision': precision,
+            'recall': recall,
+            'f1_score': f1,
+            'confusion_matrix': np.rint(cm / n_repeats).astype(int).tolist(),
+            'classification_report': reporte,
+            'cv_method': estrategia['cv_method'],
+        }
+
+    return results
+
+
+def registrar_en_metadata(models_dir, estrategia, results_kfold=None):
+    """
+    Registra la política en model_metadata.json.
+
+    Con LOOCV se conserva lo que escribió el trainer (validation_method y cv_method).
+    Con k-fold se reemplazan las métricas por las de validar_kfold() y se actualiza
+    best_model (y best_model.joblib) si el mejor modelo cambia.
+    Devuelve el nombre del mejor modelo.
+    """
+    metadata_path = os.path.join(models_dir, 'model_metadata.json')
+    with open(metadata_path, 'r') as f:
+        metadata = json.load(f)
+
+    if results_kfold is not None:
+        metadata['validation_method'] = estrategia['validation_method']
+        for nombre, metricas in results_kfold.items():
+            metadata.setdefault('results', {}).setdefault(nombre, {}).update(metricas)
+
+        # En caso de empate se mantiene el mejor modelo que eligió el trainer
+        mejor = max(results_kfold, key=lambda n: (results_kfold[n]['accuracy'], n == metadata.get('best_model')))
+        if mejor != metadata.get('best_model'):
+            shutil.copyfile(os.path.join(models_dir, f'{mejor}.joblib'),
+                            os.path.join(models_dir, 'best_model.joblib'))
+            metadata['best_model'] = mejor
+
+    metadata['validation_policy'] = {
+        'cv_method': estrategia['cv_method'],
+        'filas_entrenamiento': estrategia['filas_entrenamiento'],
+        'filas_submuestreadas': estrategia['filas_submuestreadas'],
+        'max_por_tier': estrategia['max_por_tier'],
+    }
+
+    with open(metadata_path, 'w') as f:
+        json.dump(metadata, f, indent=2, default=float)
+    return metadata['best_model']